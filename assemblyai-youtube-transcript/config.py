@@ -1,14 +1,22 @@
 import os
+from typing import Final, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Resolved once at import; every consumer reads the same value
+ASSEMBLYAI_AUTH_KEY: Final[Optional[str]] = os.environ.get('ASSEMBLYAI_AUTH_KEY')
+
 class Config:
-    ASSEMBLYAI_AUTH_KEY = os.environ.get('ASSEMBLYAI_AUTH_KEY')
+    ASSEMBLYAI_AUTH_KEY = ASSEMBLYAI_AUTH_KEY
     DEFAULT_OUTPUT_DIR = "clips"
     DEFAULT_TEMP_DIR = "temp"
     DEFAULT_SIMILARITY_THRESHOLD = 80
     DEFAULT_CLIP_DURATION = 30
     DEFAULT_SUBTITLE_MODE = "word"
+    # Resolved against this file rather than the working directory
+    ANTON_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'Anton', 'Anton-Regular.ttf')
+    USE_ARIA2C = True  # Segmented audio downloads when aria2c is on PATH
+    CLIP_CACHE_MAX_BYTES = 2 * 1024 ** 3  # Least recently used clips are pruned beyond this; 0 or less disables the clip cache
 
 config = Config()
@@ -1,7 +1,8 @@
+import asyncio
 import assemblyai as aai
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from searchers import FuzzySearcher, BaseSearcher
-import config as app_config
+from config import config as app_config
 
 class TranscriptionHandler:
     def __init__(self, searcher: Optional[BaseSearcher] = None):
@@ -12,7 +13,7 @@ class TranscriptionHandler:
             api_key: AssemblyAI API key
             searcher: Optional custom searcher implementation
         """
-        aai.settings.api_key = app_config.config.ASSEMBLYAI_AUTH_KEY
+        aai.settings.api_key = app_config.ASSEMBLYAI_AUTH_KEY
         self.transcriber = aai.Transcriber()
         self.searcher = searcher or FuzzySearcher()  # Use FuzzySearcher as default
 
@@ -20,6 +21,11 @@ class TranscriptionHandler:
         """Transcribe audio file using AssemblyAI."""
         return self.transcriber.transcribe(audio_path) # self.transcriber.transcribe(audio_path) # aai.Transcript.get_by_id('b329f1b0-5188-4033-b827-6b0b0cc23152')
 
+    async def transcribe_many(self, audio_paths: List[str]) -> List[aai.Transcript]:
+        """Transcribe several audio files concurrently, preserving input order."""
+        return await asyncio.gather(
+            *(asyncio.to_thread(self.transcribe, path) for path in audio_paths))
+
     def find_text_segment(self,
                          transcript: aai.Transcript,
                          start_text: str,
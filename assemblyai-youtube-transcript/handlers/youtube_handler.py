@@ -1,47 +1,36 @@
-import contextlib
-import sys
+import copy
+import functools
+import hashlib
 import traceback
-import yt_dlp
+import numpy as np
 import os
+import re
+import shutil
 import subprocess
-import os
+import tempfile
+import threading
+import time
 
-from io import StringIO
-from urllib.parse import parse_qs, urlparse
-from typing import List
-from yt_dlp.utils import download_range_func
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from typing import List, Optional, Union
 from config import config as app_config
 from enum import Enum
-from utils import setup_logger, millisec_to_srt_time, get_ass_style
+from utils import setup_logger, millisec_to_srt_time, millisec_to_ass_times, get_ass_style, words_to_array
 
 logger = setup_logger('youtube_handler')
 
-@contextlib.contextmanager
-def capture_moviepy_output():
-    """Capture moviepy output and redirect it to our logger."""
-    moviepy_stdout = StringIO()
-    moviepy_stderr = StringIO()
-    old_stdout = sys.stdout
-    old_stderr = sys.stderr
-    try:
-        sys.stdout = moviepy_stdout
-        sys.stderr = moviepy_stderr
-        yield
-    finally:
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
-        # Log captured output
-        stdout_content = moviepy_stdout.getvalue().strip()
-        stderr_content = moviepy_stderr.getvalue().strip()
-        if stdout_content:
-            logger.debug("MoviePy stdout:")
-            for line in stdout_content.split('\n'):
-                logger.debug(line)
-        if stderr_content:
-            logger.warning("MoviePy stderr:")
-            for line in stderr_content.split('\n'):
-                logger.warning(line)
-                
+# Matches youtu.be/<id>, youtube.com/watch?...v=<id> and youtube.com/{embed,shorts,live,v}/<id>,
+# on youtube.com subdomains and youtube-nocookie.com alike
+VIDEO_ID_PATTERN = re.compile(
+    r'(?:youtu\.be/|youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#]*&)?v=|embed/|shorts/|live/|v/))([\w-]+)'
+)
+
+# yt-dlp extractors to register: the video extractor, plus the tab extractor that claims
+# watch?v=<id>&list=... URLs and, with noplaylist set, hands back just the video
+YOUTUBE_EXTRACTORS = ['youtube', 'youtube:tab']
 
 class SubtitleConfig:
     """Configuration class for subtitle styling"""
@@ -49,7 +38,7 @@ class SubtitleConfig:
     INACTIVE_COLOR = 'gray'     # Color for other visible words
     DEFAULT_WINDOW_SIZE = 5     # Number of words visible at once
     FONT_SIZE = 72             # Base font size
-    FONT_PATH = os.path.join('assets', 'Anton', 'Anton-Regular.ttf')
+    FONT_PATH = app_config.ANTON_FONT_PATH
     DEFAULT_SIMILARITY_THRESHOLD = 80
     
     
@@ -58,32 +47,260 @@ class SubtitleMode(Enum):
     PHRASE = "phrase"
     NONE = "none"
 
+def highlight_filter(subtitle_path: str) -> str:
+    """FFmpeg video filter that crops to a centered square and burns in the ASS subtitles."""
+    return f'crop=ih:ih:(iw-ih)/2:0,ass={subtitle_path}'
+
+# Hardware H.264 encoders in order of preference, with their output arguments
+HARDWARE_ENCODERS = {
+    'h264_nvenc': ['-c:v', 'h264_nvenc', '-preset', 'p4', '-tune', 'll', '-rc', 'vbr', '-b:v', '4M'],
+    'h264_videotoolbox': ['-c:v', 'h264_videotoolbox', '-b:v', '4M'],
+}
+
+@functools.lru_cache(maxsize=1)
+def get_video_encoder_args() -> List[str]:
+    """
+    FFmpeg video encoder arguments for subtitle burn-in.
+    Uses the first hardware encoder the local ffmpeg both lists and can open,
+    otherwise x264 at the ultrafast preset.
+    """
+    try:
+        listing = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    except OSError as e:
+        logger.debug(f"Encoder listing failed: {str(e)}")
+        listing = ''
+
+    for encoder, args in HARDWARE_ENCODERS.items():
+        if encoder not in listing:
+            continue
+        # Being compiled in does not mean the device is present, so open it once
+        probe = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.1',
+            '-c:v', encoder, '-f', 'null', '-'
+        ]
+        try:
+            result = subprocess.run(probe, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if result.returncode == 0:
+                logger.debug(f"Using {encoder} hardware encoder")
+                return args
+        except OSError as e:
+            logger.debug(f"{encoder} probe failed: {str(e)}")
+    return ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '23']
+
+@functools.lru_cache(maxsize=1)
+def get_video_decoder_args() -> List[str]:
+    """
+    FFmpeg input arguments that move H.264 decoding to NVDEC alongside NVENC.
+    Frames still come back to system memory for the crop and ass filters.
+    """
+    if 'h264_nvenc' in get_video_encoder_args():
+        return ['-hwaccel', 'cuda']
+    return []
+
+@functools.lru_cache(maxsize=1)
+def get_audio_downloader_opts() -> dict:
+    """
+    yt-dlp options for multi-connection downloads through aria2c.
+    When disabled or when aria2c is not installed, yt-dlp's native downloader
+    fetches fragmented (DASH) formats several fragments at a time instead.
+    """
+    if not app_config.USE_ARIA2C or not shutil.which('aria2c'):
+        return {'concurrent_fragment_downloads': 8}
+    return {
+        'external_downloader': {'default': 'aria2c'},
+        'external_downloader_args': {
+            'aria2c': ['-x', '16', '-s', '16', '-k', '1M', '--min-split-size=1M', '--file-allocation=none']
+        },
+    }
+
+# Audio downloaders, one per thread and output directory
+_audio_ydl = threading.local()
+
+def get_audio_ydl(output_dir: str):
+    """
+    YoutubeDL instance for audio downloads into output_dir. Its options never change
+    between calls, so it is reused to keep the extractor and HTTP session warm.
+    Instances are not shared across threads.
+    """
+    instances = _audio_ydl.__dict__.setdefault('instances', {})
+    ydl = instances.get(output_dir)
+    if ydl is None:
+        # yt-dlp is only imported once a download is actually needed
+        import yt_dlp
+
+        ydl = instances[output_dir] = yt_dlp.YoutubeDL({
+            'format': 'm4a/bestaudio/best',
+            'paths': {'home': output_dir},
+            'outtmpl': {'default': '%(id)s.%(ext)s'},
+            'allowed_extractors': YOUTUBE_EXTRACTORS,
+            'noplaylist': True,
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'm4a',
+            }],
+            **get_audio_downloader_opts()
+        })
+    return ydl
+
+# Extracted (unprocessed) video metadata by video ID, least recently used first. Stream
+# URLs expire after a few hours, so entries are refreshed well before that, and only
+# a bounded number of info dicts (often several MB each) are kept.
+VIDEO_INFO_TTL = 30 * 60
+VIDEO_INFO_CACHE_SIZE = 32
+_video_info_cache = OrderedDict()
+_video_info_lock = threading.Lock()
+
+def get_video_info(url: str) -> dict:
+    """
+    Metadata for a video, extracted once and shared by every clip cut from it.
+    Returns a private copy, since yt-dlp mutates the info while processing it.
+    """
+    # URL variants of the same video share an entry; unrecognised URLs key on themselves
+    key = YouTubeHandler.get_video_id(url) or url
+    with _video_info_lock:
+        entry = _video_info_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] > VIDEO_INFO_TTL:
+            del _video_info_cache[key]
+            entry = None
+        elif entry is not None:
+            _video_info_cache.move_to_end(key)
+    if entry is None:
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL({
+            'quiet': True,
+            'no_warnings': True,
+            'allowed_extractors': YOUTUBE_EXTRACTORS,
+            'noplaylist': True,
+            'logger': logger
+        }) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+            # Playlist URLs resolve to a reference to the single video; cache the video itself
+            if info.get('_type') == 'url':
+                info = ydl.extract_info(info['url'], ie_key=info.get('ie_key'), download=False, process=False)
+            entry = (time.monotonic(), info)
+        with _video_info_lock:
+            _video_info_cache[key] = entry
+            _video_info_cache.move_to_end(key)
+            while len(_video_info_cache) > VIDEO_INFO_CACHE_SIZE:
+                _video_info_cache.popitem(last=False)
+    return copy.deepcopy(entry[1])
+
+ESCAPE_TABLE = str.maketrans({
+    "'": "\u2019",  # Use Unicode right single quotation mark
+    '"': '\\"',
+    ',': '\\,',
+    ':': '\\:',
+})
+
+@functools.lru_cache(maxsize=None)
+def ensure_dir(path: str) -> str:
+    """Create a directory once per process; later calls for the same path skip the syscalls."""
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# Finished clips keyed by everything that shapes their content
+CLIP_CACHE_DIR = os.path.join(app_config.DEFAULT_TEMP_DIR, '.yt_cache')
+
+def clip_cache_key(video_id: str, start_time: float, duration: int, font_size: int,
+                   window_size: int, words: np.ndarray, burn_subtitles: bool) -> str:
+    """
+    Stable digest of the clip request. Subtitled clips include the styling and the word
+    timings and texts; clips without subtitles only depend on the time range.
+    """
+    # Millisecond precision, matching the range download_range_func actually cuts
+    digest = hashlib.sha1(
+        f"{video_id}|{start_time:.3f}|{duration:.3f}|{burn_subtitles}".encode())
+    if burn_subtitles:
+        digest.update(f"|{font_size}|{window_size}".encode())
+        digest.update(np.ascontiguousarray(words['start']).tobytes())
+        digest.update(np.ascontiguousarray(words['end']).tobytes())
+        digest.update('\x00'.join(words['text'].tolist()).encode('utf-8'))
+    return digest.hexdigest()
+
+def prune_clip_cache(max_bytes: int) -> None:
+    """Delete the least recently used cached clips until the cache fits in max_bytes."""
+    entries = []
+    with os.scandir(CLIP_CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith('.mp4'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Pruned by a concurrent extraction
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = 0
+    for _, size, path in sorted(entries, reverse=True):
+        total += size
+        if total > max_bytes:
+            Path(path).unlink(missing_ok=True)
+            logger.debug(f"Pruned cached clip: {path}")
+
+def store_in_clip_cache(clip_path: str, cache_path: str) -> None:
+    """
+    Copy a finished clip into the cache, then prune it. The clip itself is already
+    complete, so cache I/O failures are only logged.
+    """
+    try:
+        # Not memoized through ensure_dir: the directory may be removed while running
+        os.makedirs(CLIP_CACHE_DIR, exist_ok=True)
+        copy_replace(clip_path, cache_path)
+        prune_clip_cache(app_config.CLIP_CACHE_MAX_BYTES)
+    except OSError as e:
+        logger.warning(f"Could not store clip in cache: {str(e)}")
+
+def copy_replace(src: str, dst: str) -> None:
+    """
+    Copy src over dst through a temporary file in dst's directory. dst always gets a fresh
+    inode, so later in-place writes to an output clip can never reach a cache entry.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(dst) or '.')
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+def run_ffmpeg(cmd: List[str]) -> bool:
+    """
+    Run an ffmpeg command started with '-loglevel error', discarding stdout.
+    Only errors reach stderr, and they are decoded and logged only when ffmpeg fails.
+    """
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        logger.error(f"FFmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+        return False
+    return True
+
+# ASS override tags switching the fill to the highlight colour and back to white
+HIGHLIGHT_PREFIX = "{\\1c&HC7C700&}"
+HIGHLIGHT_SUFFIX = "{\\1c&HFFFFFF&}"
+
+@functools.lru_cache(maxsize=4096)
+def highlight_word(text: str) -> str:
+    """ASS fragment drawing a word in the highlight colour; shared across clips in a batch."""
+    return HIGHLIGHT_PREFIX + text + HIGHLIGHT_SUFFIX
+
 def escape_text(text) -> str:
     """Helper function to properly escape text for FFmpeg."""
-    text = text.replace("'", "\u2019")  # Use Unicode right single quotation mark
-    text = text.replace('"', '\\"')
-    text = text.replace(',', '\\,')
-    text = text.replace(':', '\\:')
-    return text
+    return text.translate(ESCAPE_TABLE)
 
 class YouTubeHandler:
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def get_video_id(url: str) -> str:
         """Extract video ID from various YouTube URL formats."""
         if not url:
             return None
-            
-        if "youtu.be" in url:
-            return url.split('/')[-1].split('?')[0]
-            
-        if "youtube.com" in url:
-            parsed_url = urlparse(url)
-            if "watch" in url:
-                return parse_qs(parsed_url.query).get('v', [None])[0]
-            elif "embed" in url:
-                return parsed_url.path.split('/')[-1]
-                
-        return None
+
+        match = VIDEO_ID_PATTERN.search(url)
+        return match.group(1) if match else None
 
     @staticmethod
     def download_audio(url: str, output_dir: str = app_config.DEFAULT_TEMP_DIR) -> str:
@@ -91,87 +308,165 @@ class YouTubeHandler:
         Download audio from YouTube video.
         Returns path to downloaded file.
         """
-        os.makedirs(output_dir, exist_ok=True)
-        
-        ydl_opts = {
-            'format': 'm4a/bestaudio/best',
-            'paths': {'home': output_dir},
-            'outtmpl': {'default': '%(id)s.%(ext)s'},
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'm4a',
-            }]
-        }
-        
+        ensure_dir(output_dir)
+
+        # The file name only depends on the video ID, so an earlier download can be reused
+        video_id = YouTubeHandler.get_video_id(url)
+        if video_id:
+            cached_path = os.path.join(output_dir, f"{video_id}.m4a")
+            if os.path.exists(cached_path):
+                logger.info(f"Reusing downloaded audio: {cached_path}")
+                return cached_path
+
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                video_id = info['id']
-                return os.path.join(output_dir, f"{video_id}.m4a")
+            info = get_audio_ydl(output_dir).extract_info(url, download=True)
+            video_id = info['id']
+            return os.path.join(output_dir, f"{video_id}.m4a")
         except Exception as e:
             raise Exception(f"Failed to download audio: {str(e)}")
 
+    @staticmethod
+    def download_audio_many(urls: List[str], output_dir: str = app_config.DEFAULT_TEMP_DIR,
+                            max_workers: int = 8) -> List[str]:
+        """
+        Download audio for several YouTube videos concurrently.
+        Returns paths to the downloaded files in the same order as the URLs.
+        """
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+            return list(executor.map(
+                lambda url: YouTubeHandler.download_audio(url, output_dir), urls))
+
+    @staticmethod
+    def write_highlight_subtitles(subtitle_path: str, words: Union[List[dict], np.ndarray],
+                                  window_size: int = SubtitleConfig.DEFAULT_WINDOW_SIZE,
+                                  font_size: int = SubtitleConfig.FONT_SIZE) -> str:
+        """
+        Write an ASS subtitle file highlighting each word of the window as it is spoken.
+        Timings are relative to the first word. Returns the subtitle path.
+        """
+        words = words_to_array(words)
+
+        # ASS header with style configuration. The black 4px border lives in the style,
+        # so words only carry the highlight colour. Increased margin to move text higher.
+        lines = [get_ass_style(font_size=font_size, margin_v=250, outline=4)]
+
+        clip_start_ms = words['start'][0]
+
+        # Clip-relative timings (ms) for every word, computed in one pass. Each word stays
+        # on screen until the last word of its window ends.
+        word_count = len(words)
+        texts = words['text'].tolist()
+        window_ends = words['end'][np.minimum(np.arange(window_size, word_count + window_size, window_size), word_count) - 1]
+        start_strs = millisec_to_ass_times(words['start'] - clip_start_ms)
+        end_strs = millisec_to_ass_times(window_ends - clip_start_ms)
+
+        for window_idx, i in enumerate(range(0, word_count, window_size)):
+            window_texts = texts[i:i + window_size]
+            if not window_texts:
+                continue
+
+            end_str = end_strs[window_idx]
+
+            # For each word in the window
+            for word_idx, text in enumerate(window_texts):
+                start_str = start_strs[i + word_idx]
+
+                # Build text with highlighted word using the specific cyan color
+                text_parts = list(window_texts)
+                text_parts[word_idx] = highlight_word(text)
+
+                formatted_text = ' '.join(text_parts)
+                
+                lines.append(f"Dialogue: {word_idx},{start_str},{end_str},Default,,0,0,0,,{formatted_text}\n")
+
+        with open(subtitle_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+
+        return subtitle_path
+
     @staticmethod
     def process_video_with_highlights(input_file: str, output_file: str, 
-                            words: List[dict], duration: float,
+                            words: Union[List[dict], np.ndarray], duration: float,
                             window_size: int = SubtitleConfig.DEFAULT_WINDOW_SIZE,
                             font_size: int = SubtitleConfig.FONT_SIZE) -> bool:
+        """Burn highlighted subtitles into an already downloaded clip."""
+        if len(words) == 0:
+            logger.debug("No words to subtitle, skipping video processing")
+            return False
+
+        subtitle_path = output_file + '.ass'
         try:
-            subtitle_path = output_file + '.ass'
-            
-            with open(subtitle_path, 'w', encoding='utf-8') as f:
-                # Write ASS header with style configuration
-                f.write(get_ass_style(font_size=font_size, margin_v=250))  # Increased margin to move text higher
-                
-                clip_start_ms = words[0]['start']
-                
-                for i in range(0, len(words), window_size):
-                    window_words = words[i:i + window_size]
-                    if not window_words:
-                        continue
-                    
-                    # For each word in the window
-                    for word_idx, word in enumerate(window_words):
-                        start_time = (word['start'] - clip_start_ms) / 1000.0
-                        end_time = (window_words[-1]['end'] - clip_start_ms) / 1000.0
-                        
-                        start_str = f"{int(start_time//3600)}:{int((start_time%3600)//60):02d}:{start_time%60:05.2f}"
-                        end_str = f"{int(end_time//3600)}:{int((end_time%3600)//60):02d}:{end_time%60:05.2f}"
-                        
-                        # Build text with highlighted word using the specific cyan color
-                        text_parts = []
-                        for idx, w in enumerate(window_words):
-                            if idx == word_idx:
-                                text_parts.append(f"{{\\1c&HC7C700&\\3c&H000000&\\bord4}}{w['text']}{{\\1c&HFFFFFF&\\3c&H000000&\\bord4}}")
-                            else:
-                                text_parts.append(f"{{\\3c&H000000&\\bord4}}{w['text']}")
-                        
-                        formatted_text = ' '.join(text_parts)
-                        
-                        f.write(f"Dialogue: {word_idx},{start_str},{end_str},Default,,0,0,0,,{formatted_text}\n")
-            
-            
+            YouTubeHandler.write_highlight_subtitles(
+                subtitle_path, words, window_size=window_size, font_size=font_size)
+
             cmd = [
-                'ffmpeg', '-y',
+                'ffmpeg', '-y', '-nostdin',
+                '-hide_banner', '-loglevel', 'error',
+                *get_video_decoder_args(),
                 '-i', input_file,
-                '-vf', f'crop=ih:ih:(iw-ih)/2:0,ass={subtitle_path}',  # Crop to square from center
+                '-vf', highlight_filter(subtitle_path),
+                *get_video_encoder_args(),
                 '-c:a', 'copy',
                 output_file
             ]
-            
-            subprocess.run(cmd, check=True)
-            
-            # Clean up
-            if os.path.exists(subtitle_path):
-                os.remove(subtitle_path)
-            
-            return True
 
-        except Exception as e:
-            print(f"Error processing video: {str(e)}")
-            traceback.print_exc()
+            return run_ffmpeg(cmd)
+
+        except Exception:
+            logger.exception("Error processing video")
             return False
-    
+
+        finally:
+            Path(subtitle_path).unlink(missing_ok=True)
+
+    @staticmethod
+    def process_videos_with_highlights(jobs: List[dict],
+                                       window_size: int = SubtitleConfig.DEFAULT_WINDOW_SIZE,
+                                       font_size: int = SubtitleConfig.FONT_SIZE) -> bool:
+        """
+        Burn highlighted subtitles into several downloaded clips with a single ffmpeg run.
+        Each job holds 'input_file', 'output_file' and 'words'; every clip becomes one
+        input and one output of the same process instead of a process of its own.
+        """
+        jobs = [job for job in jobs if len(job['words'])]
+        if not jobs:
+            logger.debug("No words to subtitle, skipping video processing")
+            return False
+
+        subtitle_paths = []
+        try:
+            cmd = ['ffmpeg', '-y', '-nostdin', '-hide_banner', '-loglevel', 'error']
+            filters = []
+            outputs = []
+            for idx, job in enumerate(jobs):
+                subtitle_path = job['output_file'] + '.ass'
+                subtitle_paths.append(subtitle_path)
+                YouTubeHandler.write_highlight_subtitles(
+                    subtitle_path, job['words'], window_size=window_size, font_size=font_size)
+
+                cmd += [*get_video_decoder_args(), '-i', job['input_file']]
+                filters.append(f"[{idx}:v]{highlight_filter(subtitle_path)}[v{idx}]")
+                outputs += [
+                    '-map', f'[v{idx}]', '-map', f'{idx}:a?',
+                    *get_video_encoder_args(),
+                    '-c:a', 'copy',
+                    job['output_file']
+                ]
+
+            cmd += ['-filter_complex', ';'.join(filters), *outputs]
+
+            return run_ffmpeg(cmd)
+
+        except Exception:
+            logger.exception("Error processing videos")
+            return False
+
+        finally:
+            for subtitle_path in subtitle_paths:
+                Path(subtitle_path).unlink(missing_ok=True)
+
     @staticmethod
     def extract_clip(
         url: str,
@@ -180,12 +475,12 @@ class YouTubeHandler:
         duration: int = 30, 
         output_dir: str = app_config.DEFAULT_OUTPUT_DIR,
         window_size: int = 5,
-        words: List[dict] = [],
+        words: Union[List[dict], np.ndarray] = [],
     ) -> str:
         """
         Extract video clip, optimized for short segments.
         """
-        os.makedirs(output_dir, exist_ok=True)
+        ensure_dir(output_dir)
 
         video_id = YouTubeHandler.get_video_id(url)
         base_output = f"{video_id}_clip_{int(start_time)}.mp4"
@@ -193,6 +488,7 @@ class YouTubeHandler:
 
         srt_output_path = os.path.join(output_dir, f"{base_output}.srt")
         final_output_path = os.path.join(output_dir, f"{base_output}_subtitled.mp4")
+        subtitle_output_path = f"{final_output_path}.ass"
 
         try:
             logger.info(f"Starting clip extraction: {duration}s from {int(start_time)}s")
@@ -200,37 +496,91 @@ class YouTubeHandler:
             logger.debug("Output paths:")
             logger.debug(f"  Base MP4: {base_output_path}")
             logger.debug(f"  SRT: {srt_output_path}")
+            logger.debug(f"  ASS: {subtitle_output_path}")
             logger.debug(f"  Final MP4: {final_output_path}")
             
-            if words:
+            # Column layout shared by the SRT and ASS writers
+            words = words_to_array(words)
+
+            if len(words):
                 logger.info("Generating SRT file from word timestamps")
+                srt_content = ''.join(
+                    f"{i}\n{millisec_to_srt_time(start)} --> {millisec_to_srt_time(end)}\n{text}\n\n"
+                    for i, (start, end, text) in enumerate(
+                        zip(words['start'].tolist(), words['end'].tolist(), words['text'].tolist()), 1)
+                )
                 with open(srt_output_path, 'w', encoding='utf-8') as f:
-                    for i, word in enumerate(words, 1):
-                        start_time_str = millisec_to_srt_time(word['start'])
-                        end_time_str = millisec_to_srt_time(word['end'])
-                        f.write(f"{i}\n{start_time_str} --> {end_time_str}\n{word['text']}\n\n")
+                    f.write(srt_content)
                 logger.debug(f"SRT reference file generated: {srt_output_path}")
 
+            burn_subtitles = SubtitleMode(app_config.DEFAULT_SUBTITLE_MODE) is not SubtitleMode.NONE
+
+            # Identical requests reuse the clip produced earlier instead of downloading again.
+            # A limit of 0 or less disables the cache, and URLs without a recognised video ID
+            # bypass it because their key could not tell two videos apart.
+            use_cache = app_config.CLIP_CACHE_MAX_BYTES > 0 and bool(video_id)
+            cache_path = None
+            if use_cache:
+                cache_path = os.path.join(CLIP_CACHE_DIR, clip_cache_key(
+                    video_id, start_time, duration, font_size, window_size, words,
+                    bool(len(words)) and burn_subtitles) + '.mp4')
+            if use_cache and os.path.exists(cache_path):
+                output_path = final_output_path if len(words) and burn_subtitles else base_output_path
+                try:
+                    copy_replace(cache_path, output_path)
+                    os.utime(cache_path)  # Mark as recently used for pruning
+                    logger.info(f"Reusing cached clip: {output_path}")
+                    return output_path
+                except FileNotFoundError:
+                    logger.debug(f"Cached clip pruned before it could be reused: {cache_path}")
+
+            # Re-rendering with different subtitles: burn them into the cached plain clip
+            # of the same range instead of downloading it again
+            if use_cache and len(words) and burn_subtitles:
+                plain_cache_path = os.path.join(CLIP_CACHE_DIR, clip_cache_key(
+                    video_id, start_time, duration, font_size, window_size, words, False) + '.mp4')
+                # ffmpeg -y truncates its output in place, so render next to the final
+                # path and swap it in rather than writing into an existing file
+                burn_output_path = os.path.join(output_dir, f"{base_output}_subtitled.tmp.mp4")
+                if os.path.exists(plain_cache_path) and YouTubeHandler.process_video_with_highlights(
+                        plain_cache_path, burn_output_path, words, duration,
+                        window_size=window_size, font_size=font_size):
+                    os.replace(burn_output_path, final_output_path)
+                    with suppress(FileNotFoundError):
+                        os.utime(plain_cache_path)
+                    store_in_clip_cache(final_output_path, cache_path)
+                    logger.info(f"Subtitled cached clip without downloading: {final_output_path}")
+                    return final_output_path
+                Path(burn_output_path).unlink(missing_ok=True)
+
+            # Last reported 5% step; progress is only printed and logged when it changes
+            last_bucket = [-1]
+
             def progress_hook(d):
                 if d['status'] == 'downloading':
                     try:
                         downloaded = d.get('downloaded_bytes', 0)
                         total = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0)
-                        
+
                         if total:
-                            percent = (downloaded / total) * 100
-                            print(f"\rDownload Progress: {percent:.1f}%", end='', flush=True)
-                            
-                            if percent == 0:
+                            bucket = int(downloaded * 20 // total)
+                            if bucket == last_bucket[0]:
+                                return
+                            last_bucket[0] = bucket
+
+                            percent = bucket * 5
+                            print(f"\rDownload Progress: {percent}%", end='', flush=True)
+
+                            if bucket == 0:
                                 logger.info("Starting download...")
-                            elif percent == 100:
+                            elif bucket >= 20:
                                 logger.info("Download complete!")
-                            elif percent % 25 == 0:
-                                logger.debug(f"Download Progress: {percent:.1f}%")
-                                
+                            elif bucket % 5 == 0:
+                                logger.debug(f"Download Progress: {percent}%")
+
                             if d.get('speed') and d['speed'] < 50000:
                                 logger.warning("Download speed is unusually slow")
-                                
+
                     except Exception as e:
                         logger.error(f"Error in progress hook: {str(e)}")
                         
@@ -240,85 +590,132 @@ class YouTubeHandler:
                 elif d['status'] == 'error':
                     logger.error(f"Download error: {d.get('error', 'Unknown error')}")
 
-            ydl_opts = {
-                'format': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
-                'outtmpl': {
-                    'default': base_output_path  # Use base output path for initial download
-                },
-                'download_ranges': download_range_func(None, [(start_time, start_time + duration)]),
-                'force_keyframes_at_cuts': True,
-                # 'quiet': True,
-                'no_warnings': True,
-                'progress_hooks': [progress_hook],
-                'postprocessor_args': {
-                    'ffmpeg': [
-                        '-loglevel', 'info',  # Capture all FFmpeg info
-                        '-hide_banner'
-                    ]
-                },
-                'retries': 1,
-                'fragment_retries': 1,
-                'buffersize': 1024,
-                'http_chunk_size': 1024 * 1024,
-                'logger': logger
-            }
-
-            logger.info("Constructing FFmpeg command with options:")
-            logger.info(f"Format: {ydl_opts['format']}")
-            logger.info(f"Output template: {ydl_opts['outtmpl']['default']}")
-            logger.info(f"Time range: {start_time}s to {start_time + duration}s")
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                logger.info("Starting video download")
-                # ::::::::::::::::::::::::::::;
-                info = ydl.extract_info(url, download=True)
-                downloaded_file = ydl.prepare_filename(info)
-                # downloaded_file = 'clips/7qZl_5xHoBw_clip_435.mp4' # ydl.prepare_filename(info)
-                logger.debug(f"Video downloaded to: {downloaded_file}")
-                
-                if not os.path.exists(downloaded_file):
-                    raise Exception(f"Downloaded file not found at: {downloaded_file}")
-
-                # If the downloaded file has a different name, rename it to our base output
-                if downloaded_file != base_output_path:
-                    os.rename(downloaded_file, base_output_path)
-                    logger.info(f"Renamed output file to: {base_output_path}")
-                
+            # Burn the subtitles in during the ranged download itself: yt-dlp cuts the
+            # section with ffmpeg, so appending our filter to that invocation makes it
+            # the only encode. Without subtitles the section is stream-copied.
+            subtitle_path = None
+            if len(words) and burn_subtitles:
                 try:
-                    logger.info("Starting dynamic subtitle processing")
-                    success = YouTubeHandler.process_video_with_highlights(
-                        base_output_path,
-                        final_output_path,
-                        words,
-                        duration=duration,
-                        window_size=window_size,
-                        font_size=font_size
-                    )
-
-                    # Cleanup and return appropriate path
-                    if success and os.path.exists(final_output_path):
-                        logger.info("Dynamic subtitles added successfully")
-                        logger.debug("Cleaning up intermediate video file")
-                        # :::::::::::::::::::::::::::::::::
-                        os.remove(base_output_path)
-                        return final_output_path
-                    else:
-                        logger.warning("Failed to add subtitles, returning original clip")
-                        return base_output_path
-                        
+                    subtitle_path = YouTubeHandler.write_highlight_subtitles(
+                        subtitle_output_path, words, window_size=window_size, font_size=font_size)
+                    logger.debug(f"ASS subtitle file generated: {subtitle_path}")
                 except Exception as e:
-                    logger.error(f"Subtitle processing failed: {str(e)}")
+                    logger.error(f"Subtitle generation failed: {str(e)}")
                     logger.error(traceback.format_exc())
-                    return base_output_path
+                    logger.warning("Continuing without subtitles")
+
+            import yt_dlp
+            from yt_dlp.utils import download_range_func
+
+            def download_range(output_path: str, subtitle_path: Optional[str]) -> str:
+                """Download the requested range to output_path, burning subtitle_path in when given."""
+                ydl_opts = {
+                    'format': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
+                    'outtmpl': {
+                        'default': output_path
+                    },
+                    'download_ranges': download_range_func(None, [(start_time, start_time + duration)]),
+                    'allowed_extractors': YOUTUBE_EXTRACTORS,  # Only register the YouTube extractors
+                    'noplaylist': True,
+                    # 'quiet': True,
+                    'no_warnings': True,
+                    'progress_hooks': [progress_hook],
+                    'postprocessor_args': {
+                        'ffmpeg': [
+                            '-loglevel', 'info',  # Capture all FFmpeg info
+                            '-hide_banner'
+                        ]
+                    },
+                    'retries': 1,
+                    'fragment_retries': 1,
+                    'http_chunk_size': 10 * 1024 * 1024,
+                    'logger': logger
+                }
+
+                if subtitle_path:
+                    # Output arguments for the ffmpeg downloader that cuts the requested range.
+                    # They follow yt-dlp's own '-c copy', so the video codec is overridden here.
+                    ydl_opts['external_downloader_args'] = {
+                        'ffmpeg_i': get_video_decoder_args(),
+                        'ffmpeg_o': ['-vf', highlight_filter(subtitle_path), *get_video_encoder_args(), '-c:a', 'copy']
+                    }
+
+                logger.info("Constructing FFmpeg command with options:")
+                logger.info(f"Format: {ydl_opts['format']}")
+                logger.info(f"Output template: {ydl_opts['outtmpl']['default']}")
+                logger.info(f"Time range: {start_time}s to {start_time + duration}s")
+
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    logger.info("Starting video download")
+                    info = ydl.process_ie_result(get_video_info(url), download=True)
+                    downloaded_file = ydl.prepare_filename(info)
+                    logger.debug(f"Video downloaded to: {downloaded_file}")
+
+                    if not os.path.exists(downloaded_file):
+                        raise Exception(f"Downloaded file not found at: {downloaded_file}")
+
+                    # If the downloaded file has a different name, rename it to our output
+                    if downloaded_file != output_path:
+                        os.replace(downloaded_file, output_path)
+                        logger.info(f"Renamed output file to: {output_path}")
+
+                return output_path
+
+            if subtitle_path:
+                try:
+                    output_path = download_range(final_output_path, subtitle_path)
+                    logger.info("Dynamic subtitles added successfully")
+                except Exception as e:
+                    # The burn runs inside the download's ffmpeg, so a libass, decoder or
+                    # encoder failure surfaces here; fetch the plain range instead
+                    logger.error(f"Subtitle burn-in failed: {str(e)}")
+                    logger.warning("Failed to add subtitles, returning original clip")
+                    Path(final_output_path).unlink(missing_ok=True)
+                    subtitle_path = None
+                    output_path = download_range(base_output_path, None)
+                finally:
+                    Path(subtitle_output_path).unlink(missing_ok=True)
+            else:
+                output_path = download_range(base_output_path, None)
+
+            # A clip that ended up without subtitles is stored under the plain key of its range
+            if use_cache:
+                if not subtitle_path:
+                    cache_path = os.path.join(CLIP_CACHE_DIR, clip_cache_key(
+                        video_id, start_time, duration, font_size, window_size, words, False) + '.mp4')
+                store_in_clip_cache(output_path, cache_path)
+
+            return output_path
 
         except Exception as e:
             logger.error(f"Clip extraction failed: {str(e)}")
             logger.error(traceback.format_exc())
-            for path in [base_output_path, final_output_path, srt_output_path]:
-                if os.path.exists(path):
-                    try:
-                        os.remove(path)
-                        logger.info(f"Cleaned up: {path}")
-                    except Exception as cleanup_error:
-                        logger.error(f"Failed to clean up {path}: {str(cleanup_error)}")
-            raise
\ No newline at end of file
+            for path in map(Path, [base_output_path, final_output_path, srt_output_path, subtitle_output_path]):
+                try:
+                    path.unlink()
+                    logger.info(f"Cleaned up: {path}")
+                except FileNotFoundError:
+                    pass
+                except OSError as cleanup_error:
+                    logger.error(f"Failed to clean up {path}: {str(cleanup_error)}")
+            raise
+
+    @staticmethod
+    def extract_clips_batch(jobs: List[dict], max_workers: int = 4) -> List[Optional[str]]:
+        """
+        Extract several clips concurrently so downloads overlap with encoding.
+        Each job holds extract_clip keyword arguments. Keep max_workers small (2-4) to
+        avoid YouTube rate limiting. Returns clip paths in job order, None for failed jobs.
+        """
+        if not jobs:
+            return []
+
+        def run(job: dict) -> Optional[str]:
+            try:
+                return YouTubeHandler.extract_clip(**job)
+            except Exception as e:
+                logger.error(f"Batch clip failed for {job.get('url')}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+            return list(executor.map(run, jobs))
@@ -1,54 +1,83 @@
 import traceback
-from urllib.parse import parse_qs, urlparse
+from contextlib import suppress
 from typing import List, Optional
-from yt_dlp.utils import download_range_func
-from subprocess import DEVNULL
-from typing import Optional
 from config import config as app_config
+from .youtube_handler import (VIDEO_ID_PATTERN, escape_text, get_video_decoder_args,
+                              get_video_encoder_args, run_ffmpeg)
+from utils import get_ass_style, millisec_to_ass_times, words_to_array
 from enum import Enum
-import yt_dlp
+from pathlib import Path
+import numpy as np
 import os
 import subprocess
 
+# Font resolved once at import; libass loads it from its directory
+FONT_PATH = app_config.ANTON_FONT_PATH
+if not os.path.exists(FONT_PATH):
+    # Without it libass silently substitutes another font
+    raise FileNotFoundError(f"Font file not found at: {FONT_PATH}")
+FONT_DIR_ESC = os.path.dirname(FONT_PATH).replace('\\', '\\\\').replace(':', '\\:')
+
+# ASS override tags (colours are BGR). Word mode draws Anton in lime; phrase mode
+# uses karaoke timing, so each word turns purple from the moment it is spoken.
+WORD_STYLE_TAGS = "{\\fnAnton\\1c&H00FF00&}"
+PHRASE_STYLE_TAGS = "{\\fnAnton\\1c&H800080&\\2c&HFFFFFF&}"
+# Highlight layer only: words not yet spoken are fully transparent
+HIGHLIGHT_STYLE_TAGS = "{\\fnAnton\\1c&H800080&\\2a&HFF&}"
+
+def karaoke_dialogues(words, window_size, style_tags, layer=0):
+    """
+    One ASS event per window of words. Each word carries a \\k tag lasting until the
+    next word starts (the last one until it ends), so libass does the highlighting.
+    """
+    words = words_to_array(words)
+    word_count = len(words)
+    clip_start_ms = words['start'][0]
+    starts = words['start'] - clip_start_ms
+    ends = words['end'] - clip_start_ms
+
+    # A window lasts until the next one starts; the last one until its final word ends
+    window_starts = np.arange(0, word_count, window_size)
+    window_lasts = np.minimum(window_starts + window_size, word_count) - 1
+    phrase_starts = millisec_to_ass_times(starts[window_starts])
+    phrase_ends = millisec_to_ass_times(np.append(starts[window_starts[1:]], ends[-1]))
+
+    # Karaoke durations in centiseconds, rounded like the event timestamps
+    bounds = (starts + 5).astype(np.int64) // 10
+    durations = np.empty(word_count, dtype=np.int64)
+    durations[:-1] = np.diff(bounds)
+    durations[window_lasts] = (ends[window_lasts] + 5).astype(np.int64) // 10 - bounds[window_lasts]
+    tokens = [f"{{\\k{duration}}}{text.upper()}"
+              for duration, text in zip(durations.tolist(), words['text'].tolist())]
+
+    return [
+        f"Dialogue: {layer},{phrase_start},{phrase_end},Default,,0,0,0,,"
+        f"{style_tags}{' '.join(tokens[i:i + window_size])}\n"
+        for i, phrase_start, phrase_end in zip(window_starts.tolist(), phrase_starts, phrase_ends)
+    ]
+
 class SubtitleConfig:
     """Configuration class for subtitle styling"""
     ACTIVE_COLOR = 'purple'     # Color for the currently spoken word
     INACTIVE_COLOR = 'gray'     # Color for other visible words
     DEFAULT_WINDOW_SIZE = 5     # Number of words visible at once
     FONT_SIZE = 48             # Base font size
-    FONT_PATH = app_config.ANTON_FONT_PATH
+    FONT_PATH = FONT_PATH
     
 class SubtitleMode(Enum):
     WORD = "word"
     PHRASE = "phrase"
     NONE = "none"
 
-def escape_text(text) -> str:
-    """Helper function to properly escape text for FFmpeg."""
-    text = text.replace("'", "\u2019")  # Use Unicode right single quotation mark
-    text = text.replace('"', '\\"')
-    text = text.replace(',', '\\,')
-    text = text.replace(':', '\\:')
-    return text
-
 class YouTubeHandler:
     @staticmethod
     def get_video_id(url: str) -> str:
         """Extract video ID from various YouTube URL formats."""
         if not url:
             return None
-            
-        if "youtu.be" in url:
-            return url.split('/')[-1].split('?')[0]
-            
-        if "youtube.com" in url:
-            parsed_url = urlparse(url)
-            if "watch" in url:
-                return parse_qs(parsed_url.query).get('v', [None])[0]
-            elif "embed" in url:
-                return parsed_url.path.split('/')[-1]
-                
-        return None
+
+        match = VIDEO_ID_PATTERN.search(url)
+        return match.group(1) if match else None
 
     @staticmethod
     def download_audio(url: str, output_dir: str = app_config.DEFAULT_TEMP_DIR) -> str:
@@ -58,6 +87,8 @@ class YouTubeHandler:
         """
         os.makedirs(output_dir, exist_ok=True)
         
+        import yt_dlp
+
         ydl_opts = {
             'format': 'm4a/bestaudio/best',
             'paths': {'home': output_dir},
@@ -77,123 +108,129 @@ class YouTubeHandler:
             raise Exception(f"Failed to download audio: {str(e)}")
 
 
+    def write_word_subtitles(subtitle_path, words, duration, font_size):
+        """Write one upper-cased lime ASS event per word, clipped to the clip duration."""
+        words = words_to_array(words)
+        clip_start_ms = words['start'][0]
+        duration_ms = duration * 1000
+        starts = words['start'] - clip_start_ms
+        ends = words['end'] - clip_start_ms
+
+        visible = (starts < duration_ms) & (ends > 0)
+        start_strs = millisec_to_ass_times(np.maximum(starts[visible], 0))
+        end_strs = millisec_to_ass_times(np.minimum(ends[visible], duration_ms))
+
+        lines = [get_ass_style(font_size=font_size, margin_v=200, outline=3)]
+        lines += [
+            f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{WORD_STYLE_TAGS}{text.upper()}\n"
+            for start_str, end_str, text in zip(start_strs, end_strs, words['text'][visible].tolist())
+        ]
+        with open(subtitle_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+        return subtitle_path
+
+    def write_phrase_subtitles(subtitle_path, words, window_size, font_size, style_tags):
+        """Write one karaoke-timed ASS event per window of words."""
+        lines = [get_ass_style(font_size=font_size, margin_v=200, outline=2)]
+        lines += karaoke_dialogues(words, window_size, style_tags)
+        with open(subtitle_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+        return subtitle_path
+
     def add_subtitles_to_clip(input_file, output_file, words, duration, mode, window_size, font_size):
         try:
-            filter_complex = []
-            clip_start_ms = words[0]['start']
-            
             if mode == SubtitleMode.WORD:
-                for word in words:
-                    word_start = (word['start'] - clip_start_ms) / 1000
-                    word_end = (word['end'] - clip_start_ms) / 1000
-                    
-                    if word_start < duration and word_end > 0:
-                        word_start = max(0, word_start)
-                        word_end = min(duration, word_end)
-                        escaped_word = word['text'].upper().replace("'", "'\\''").replace('"', '\\"')
-                        filter_complex.append(
-                            f"drawtext=text='{escaped_word}':"
-                            f"fontsize={font_size}:fontfile='{app_config.ANTON_FONT_PATH}':"
-                            f"fontcolor=lime@1.0:borderw=3:bordercolor=black@1.0:"
-                            f"x=(w-text_w)/2:y=h-h/4:"
-                            f"enable='between(t,{word_start},{word_end})'"
-                        )
+                # One ASS event per word instead of one drawtext filter per word:
+                # libass only renders the events active on each frame
+                subtitle_path = output_file + '.ass'
+                YouTubeHandler.write_word_subtitles(subtitle_path, words, duration, font_size)
+                return YouTubeHandler.burn_ass(input_file, output_file, subtitle_path)
             else:  # PHRASE mode
-                for i in range(0, len(words), window_size):
-                    window_words = words[i:i + window_size]
-                    text = ' '.join(word['text'] for word in window_words)
-                    
-                    phrase_start = (window_words[0]['start'] - clip_start_ms) / 1000
-                    if i < len(words) - window_size:
-                        phrase_end = (words[i + window_size]['start'] - clip_start_ms) / 1000
-                    else:
-                        phrase_end = (window_words[-1]['end'] - clip_start_ms) / 1000
-                    
-                    filter_complex.append(
-                        f"drawtext=text='{escape_text(text.upper())}':"
-                        f"fontsize={font_size}:fontfile='{app_config.ANTON_FONT_PATH}':"
-                        f"fontcolor=white:borderw=2:bordercolor=black:"
-                        f"x=(w-text_w)/2:y=h-h/4:"
-                        f"enable='between(t,{phrase_start},{phrase_end})'"
-                    )
-
-                    for word_idx, word in enumerate(window_words):
-                        word_start = (word['start'] - clip_start_ms) / 1000
-                        word_end = (word['end'] - clip_start_ms) / 1000
-                        
-                        # Calculate position for each word in the window
-                        chars_before = sum(len(w['text']) for w in window_words[:word_idx]) + word_idx  # Add spaces
-                        word_width = len(word['text'])
-                        total_chars = sum(len(w['text']) for w in window_words) + len(window_words) - 1
-                        
-                        x_offset = f"(w-text_w)/2+{chars_before}*{font_size/2}"
-                        
-                        filter_complex.append(
-                            f"drawtext=text='{escape_text(word['text'].upper())}':"
-                            f"fontsize={font_size}:fontfile='{app_config.ANTON_FONT_PATH}':"
-                            f"x={x_offset}:y=h-h/4:fontcolor=#00000000:"
-                            f"box=1:boxcolor=purple@0.3:boxborderw=0:"
-                            f"enable='between(t,{word_start},{word_end})'"
-                        )
-
-
-
+                subtitle_path = output_file + '.ass'
+                YouTubeHandler.write_phrase_subtitles(
+                    subtitle_path, words, window_size, font_size, PHRASE_STYLE_TAGS)
+                return YouTubeHandler.burn_ass(input_file, output_file, subtitle_path)
 
-            return YouTubeHandler.execute_ffmpeg(input_file, output_file, filter_complex)
         except Exception as e:
             print(f"Error adding subtitles: {str(e)}")
             return False
 
     def highlight_active_word(input_file, output_file, words, duration, window_size, font_size):
         try:
-            filter_complex = []
-            clip_start_ms = words[0]['start']
-            
-            for i in range(0, len(words), window_size):
-                window_words = words[i:i + window_size]
-                
-                for word_idx, word in enumerate(window_words):
-                    word_start = (word['start'] - clip_start_ms) / 1000
-                    word_end = (word['end'] - clip_start_ms) / 1000
-                    
-                    # Calculate position for each word in the window
-                    chars_before = sum(len(w['text']) for w in window_words[:word_idx]) + word_idx  # Add spaces
-                    word_width = len(word['text'])
-                    total_chars = sum(len(w['text']) for w in window_words) + len(window_words) - 1
-                    
-                    x_offset = f"(w-text_w)/2+{chars_before}*{font_size/2}"
-                    
-                    filter_complex.append(
-                        f"drawtext=text='{escape_text(word['text'].upper())}':"
-                        f"fontsize={font_size}:fontfile='{app_config.ANTON_FONT_PATH}':"
-                        f"x={x_offset}:y=h-h/4:fontcolor=#00000000:"
-                        f"box=1:boxcolor=purple@0.3:boxborderw=0:"
-                        f"enable='between(t,{word_start},{word_end})'"
-                    )
-
-            return YouTubeHandler.execute_ffmpeg(input_file, output_file, filter_complex)
+            subtitle_path = output_file + '.ass'
+            YouTubeHandler.write_phrase_subtitles(
+                subtitle_path, words, window_size, font_size, HIGHLIGHT_STYLE_TAGS)
+            return YouTubeHandler.burn_ass(input_file, output_file, subtitle_path)
         except Exception as e:
             print(f"Error adding highlights: {str(e)}")
             return False
+
+    def burn_ass(input_file, output_file, subtitle_path):
+        """Burn an ASS file into the clip with one ass filter, then remove it."""
+        try:
+            return YouTubeHandler.execute_ffmpeg(
+                input_file, output_file, [f"ass={subtitle_path}:fontsdir={FONT_DIR_ESC}"])
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(subtitle_path)
     
     def execute_ffmpeg(input_file, output_file, filter_complex):
         try:
             filter_string = ','.join(filter_complex)
             cmd = [
-                'ffmpeg',
+                'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-nostats',
+                *get_video_decoder_args(),
                 '-i', input_file,
                 '-vf', filter_string,
+                *get_video_encoder_args(),
                 '-c:a', 'copy',
                 '-y',
                 output_file
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                print("FFmpeg error:", result.stderr)
-            return os.path.exists(output_file) and os.path.getsize(output_file) > 0
+            run_ffmpeg(cmd)
+            with suppress(OSError):
+                return os.path.getsize(output_file) > 0
+            return False
         except Exception as e:
             print(f"Error executing FFmpeg: {str(e)}")
             return False
+
+    def execute_ffmpeg_batch(jobs):
+        """
+        Run several (input_file, output_file, filter_complex) jobs as the inputs and
+        outputs of a single ffmpeg process instead of spawning one per clip.
+        Returns one success flag per job.
+        """
+        if not jobs:
+            return []
+        try:
+            cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-nostats']
+            graph = []
+            outputs = []
+            for idx, (input_file, output_file, filter_complex) in enumerate(jobs):
+                cmd += [*get_video_decoder_args(), '-i', input_file]
+                graph.append(f"[{idx}:v]{','.join(filter_complex)}[v{idx}]")
+                outputs += [
+                    '-map', f'[v{idx}]', '-map', f'{idx}:a?',
+                    *get_video_encoder_args(),
+                    '-c:a', 'copy',
+                    '-y',
+                    output_file
+                ]
+            cmd += ['-filter_complex', ';'.join(graph), *outputs]
+
+            if not run_ffmpeg(cmd):
+                return [False] * len(jobs)
+        except Exception as e:
+            print(f"Error executing FFmpeg batch: {str(e)}")
+            return [False] * len(jobs)
+
+        def produced(output_file):
+            with suppress(OSError):
+                return os.path.getsize(output_file) > 0
+            return False
+
+        return [produced(output_file) for _, output_file, _ in jobs]
     
     # def add_subtitles_to_clip(
     #     input_file: str,
@@ -405,48 +442,21 @@ class YouTubeHandler:
         font_size: int = SubtitleConfig.FONT_SIZE
     ) -> bool:
         """
-        Process video in two passes:
-        1. Add base subtitles
-        2. Add highlighting for active words
+        Burn phrase subtitles with karaoke highlighting of the active word in a single
+        ffmpeg pass: the phrase events already carry the per-word highlight timing.
         """
-
-        # Create temporary file for intermediate result
-        temp_file = output_file.replace('.mp4', '_temp.mp4')
-        
         try:
-            # First pass: Add base subtitles
-            if not YouTubeHandler.add_subtitles_to_clip(
+            return YouTubeHandler.add_subtitles_to_clip(
                 input_file=input_file,
-                output_file=temp_file,
-                words=words,
-                duration=duration,
-                mode=SubtitleMode.PHRASE,
-                window_size=window_size,
-                font_size=font_size
-            ):
-                raise Exception("Failed to add base subtitles")
-
-            print('AFTER YouTubeHandler.add_subtitles_to_clip')    
-            # Second pass: Add highlights
-            success = YouTubeHandler.highlight_active_word(
-                input_file=temp_file,
                 output_file=output_file,
                 words=words,
                 duration=duration,
+                mode=SubtitleMode.PHRASE,
                 window_size=window_size,
                 font_size=font_size
             )
-            print('AFTER YouTubeHandler.highlight_active_word YouTubeHandler.highlight_active_word', success)   
-            # Clean up temporary file
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-                
-            return True #success
-            
         except Exception as e:
-            print(f"Error in two-pass processing: {str(e)}")
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+            print(f"Error processing video: {str(e)}")
             return False
     
 
@@ -490,13 +500,15 @@ class YouTubeHandler:
                 elif d['status'] == 'finished':
                     print("\nProcessing...")
 
+            import yt_dlp
+            from yt_dlp.utils import download_range_func
+
             ydl_opts = {
                 'format': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best',
                 'outtmpl': {
                     'default': base_output_path  # Use base output path for initial download
                 },
                 'download_ranges': download_range_func(None, [(start_time, start_time + duration)]),
-                'force_keyframes_at_cuts': True,
                 'quiet': True,
                 'no_warnings': True,
                 'progress_hooks': [progress_hook],
@@ -519,12 +531,14 @@ class YouTubeHandler:
                 downloaded_file = ydl.prepare_filename(info)
                 print(f"Debug: Downloaded file: {downloaded_file}")
                 
-                if not os.path.exists(downloaded_file):
+                # If the downloaded file has a different name, rename it to our base output;
+                # a missing file surfaces from the rename or the single stat below
+                try:
+                    if downloaded_file != base_output_path:
+                        os.rename(downloaded_file, base_output_path)
+                    Path(base_output_path).stat()
+                except FileNotFoundError:
                     raise Exception(f"Downloaded file not found at: {downloaded_file}")
-
-                # If the downloaded file has a different name, rename it to our base output
-                if downloaded_file != base_output_path:
-                    os.rename(downloaded_file, base_output_path)
                 
                 print(f"\nClip successfully created at: {base_output_path}")
                 
@@ -551,8 +565,8 @@ class YouTubeHandler:
                                 window_size=window_size,
                                 font_size=SubtitleConfig.FONT_SIZE
                             )
-                        # Cleanup and return appropriate path
-                        if success and os.path.exists(final_output_path):
+                        # Cleanup and return appropriate path; success already means a non-empty output
+                        if success:
                             # os.remove(base_output_path)
                             print(f"Subtitles added successfully")
                             return final_output_path
@@ -569,7 +583,6 @@ class YouTubeHandler:
         except Exception as e:
             print(f"\nError during clip extraction: {str(e)}")
             # Cleanup any leftover files
-            for path in [base_output_path, final_output_path]:
-                if os.path.exists(path):
-                    os.remove(path)
+            for path in (Path(base_output_path), Path(final_output_path)):
+                path.unlink(missing_ok=True)
             raise
\ No newline at end of file
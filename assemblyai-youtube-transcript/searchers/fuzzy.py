@@ -1,51 +1,99 @@
+import bisect
+import weakref
 from typing import List, Tuple, Optional
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
 import assemblyai as aai
+from utils import transcript_words
 from .base import BaseSearcher
 
 class FuzzySearcher(BaseSearcher):
     """Implementation of fuzzy text searching using rapidfuzz."""
-    
-    def compare_phrases(self, phrase1: str, phrase2: str) -> Tuple[float, float, float]:
-        """Compare two phrases using different fuzzy matching strategies."""
-        return (
-            fuzz.ratio(phrase1.lower(), phrase2.lower()),
-            fuzz.partial_ratio(phrase1.lower(), phrase2.lower()),
-            fuzz.token_sort_ratio(phrase1.lower(), phrase2.lower())
+
+    SCORERS = (fuzz.ratio, fuzz.partial_ratio)
+
+    def __init__(self):
+        # Per-transcript memo of {(phrase, threshold, min_end_time): occurrences}, dropped with the transcript
+        self._occurrence_cache = weakref.WeakKeyDictionary()
+
+    def score_windows(self, search_phrase: str, window_texts: List[str],
+                      score_cutoff: float = 0) -> np.ndarray:
+        """
+        Score every window against the search phrase in one batched call per scorer.
+        Returns the best of ratio and partial_ratio for each window.
+        Scores below score_cutoff are reported as 0, which lets rapidfuzz reject
+        windows early instead of finishing the bit-parallel DP.
+        The phrase and window texts are expected to be lowercased by the caller.
+        """
+        return np.max(
+            [process.cdist([search_phrase], window_texts, scorer=scorer, score_cutoff=score_cutoff,
+                           dtype=np.float64, workers=-1)[0]
+             for scorer in self.SCORERS],
+            axis=0
         )
 
     def find_phrase_occurrences(self,
                               transcript: aai.Transcript,
                               search_phrase: str,
                               similarity_threshold: float = 80) -> List[Tuple[float, float, str, float]]:
-        """Find phrases in the transcript using fuzzy matching."""
+        """Find phrases in the transcript using fuzzy matching (memoized per transcript)."""
+        return self._cached_occurrences(transcript, search_phrase.lower(), similarity_threshold)
+
+    def _cached_occurrences(self,
+                            transcript: aai.Transcript,
+                            search_phrase: str,
+                            similarity_threshold: float,
+                            min_end_time: Optional[float] = None) -> List[Tuple[float, float, str, float]]:
+        """Memoized _search_occurrences keyed on the transcript and the search arguments."""
+        cache = self._occurrence_cache.setdefault(transcript, {})
+        key = (search_phrase, similarity_threshold, min_end_time)
+        if key not in cache:
+            cache[key] = self._search_occurrences(
+                transcript, search_phrase, similarity_threshold, min_end_time)
+        return list(cache[key])
+
+    def _search_occurrences(self,
+                            transcript: aai.Transcript,
+                            search_phrase: str,
+                            similarity_threshold: float,
+                            min_end_time: Optional[float] = None) -> List[Tuple[float, float, str, float]]:
+        """
+        Score every word window against the lowercased phrase and keep the best non-overlapping matches.
+        With min_end_time set, only windows ending after that time (in seconds) are scored.
+        """
         occurrences = []
-        search_phrase = search_phrase.lower()
         search_words = search_phrase.split()
         search_word_count = len(search_words)
         
-        words = transcript.words
-        
-        for i in range(len(words) - search_word_count + 1):
-            sequence_words = words[i:i + search_word_count]
-            sequence_text = ' '.join(word.text for word in sequence_words)
-            
-            ratio, partial_ratio, token_ratio = self.compare_phrases(
-                search_phrase, sequence_text
-            )
-            
-            best_score = max(ratio, partial_ratio, token_ratio)
-            
-            if best_score >= similarity_threshold:
-                start_time = sequence_words[0].start / 1000
-                end_time = sequence_words[-1].end / 1000
-                
-                occurrences.append((
-                    start_time,
-                    end_time,
-                    sequence_text,
-                    best_score
-                ))
+        words = transcript_words(transcript)
+        first_window = 0
+        if min_end_time is not None:
+            first_end = int(np.searchsorted(words['end'] / 1000, min_end_time, side='right'))
+            first_window = max(first_end - search_word_count + 1, 0)
+        window_count = len(words) - search_word_count + 1
+        if not search_words or window_count <= first_window:
+            return occurrences
+
+        texts = words['text'].tolist()
+        lowered_texts = [text.lower() for text in texts]
+        window_texts = [
+            ' '.join(lowered_texts[i:i + search_word_count])
+            for i in range(first_window, window_count)
+        ]
+        scores = self.score_windows(search_phrase, window_texts, score_cutoff=similarity_threshold)
+
+        hits = np.flatnonzero(scores >= similarity_threshold)
+        matches = hits + first_window
+        start_times = words['start'][matches] / 1000
+        end_times = words['end'][matches + search_word_count - 1] / 1000
+        for i, hit, start_time, end_time in zip(matches.tolist(), hits.tolist(),
+                                                start_times.tolist(), end_times.tolist()):
+            occurrences.append((
+                start_time,
+                end_time,
+                ' '.join(texts[i:i + search_word_count]),
+                float(scores[hit])
+            ))
         
         # Sort and filter occurrences
         occurrences.sort(key=lambda x: (-x[3]))
@@ -57,13 +105,17 @@ class FuzzySearcher(BaseSearcher):
                          end_text: str,
                          similarity_threshold: float = 80) -> Optional[Tuple[float, float, str, float]]:
         """Find a segment between two pieces of text in the transcript."""
-        # Find occurrences of start and end text
         start_occurrences = self.find_phrase_occurrences(
             transcript, start_text, similarity_threshold)
-        end_occurrences = self.find_phrase_occurrences(
-            transcript, end_text, similarity_threshold)
-        
-        if not start_occurrences or not end_occurrences:
+        if not start_occurrences:
+            return None
+
+        # An end match can only pair with a start it follows, so skip windows
+        # that finish before the earliest start occurrence
+        earliest_start = min(occ[0] for occ in start_occurrences)
+        end_occurrences = self._cached_occurrences(
+            transcript, end_text.lower(), similarity_threshold, min_end_time=earliest_start)
+        if not end_occurrences:
             return None
         
         return self._get_best_segment(transcript, start_occurrences, end_occurrences)
@@ -71,16 +123,20 @@ class FuzzySearcher(BaseSearcher):
     def _filter_overlapping_occurrences(self, 
                                       occurrences: List[Tuple[float, float, str, float]]
                                       ) -> List[Tuple[float, float, str, float]]:
-        """Filter out overlapping occurrences, keeping the ones with higher scores."""
+        """
+        Filter out overlapping occurrences, keeping the ones with higher scores.
+        Occurrences arrive sorted by descending score, so any accepted start within
+        0.5s already outscores the candidate; a sorted list of accepted start times
+        lets bisect find that neighbour without rescanning every accepted match.
+        """
         filtered_occurrences = []
+        accepted_starts = []
         for occ in occurrences:
-            similar_exists = any(
-                abs(existing[0] - occ[0]) < 0.5 and
-                existing[3] >= occ[3]
-                for existing in filtered_occurrences
-            )
-            if not similar_exists:
-                filtered_occurrences.append(occ)
+            pos = bisect.bisect_right(accepted_starts, occ[0] - 0.5)
+            if pos < len(accepted_starts) and accepted_starts[pos] < occ[0] + 0.5:
+                continue
+            accepted_starts.insert(pos, occ[0])
+            filtered_occurrences.append(occ)
         return filtered_occurrences
 
     def _get_best_segment(self,
@@ -95,12 +151,10 @@ class FuzzySearcher(BaseSearcher):
                 end_time = end_occ[1]
                 
                 if end_time > start_time:
-                    segment_words = []
-                    for word in transcript.words:
-                        if start_time * 1000 <= word.start <= end_time * 1000:
-                            segment_words.append(word.text)
-
-                    full_text = ' '.join(segment_words)
+                    words = transcript_words(transcript)
+                    first = np.searchsorted(words['start'], start_time * 1000, side='left')
+                    last = np.searchsorted(words['start'], end_time * 1000, side='right')
+                    full_text = ' '.join(words['text'][first:last])
                     average_score = (start_occ[3] + end_occ[3]) / 2
                     
                     return (start_time, end_time, full_text, average_score)
@@ -1,11 +1,12 @@
 import os
 import sys
 import traceback
+import numpy as np
 from typing import Optional
 from config import config as app_config
 from handlers import YouTubeHandler, TranscriptionHandler, SubtitleConfig
 from searchers import FuzzySearcher
-from utils import format_time, get_segment_texts, parse_arguments, setup_logger, parse_srt_file
+from utils import format_time, get_segment_texts, parse_arguments, setup_logger, parse_srt_file, transcript_words
 
 logger = setup_logger('main')
 
@@ -165,17 +166,14 @@ def process_video(url: str, search_phrase: str = None,
             # choice = 'y'
             if choice != 'n':
                 logger.info("Preparing clip generation")
-                segment_words = []
                 clip_end_ms = (start_time + clip_duration) * 1000
                 clip_start_ms = start_time * 1000
                 
-                for word in transcript.words:
-                    if clip_start_ms <= word.start <= clip_end_ms:
-                        segment_words.append({
-                            'text': word.text,
-                            'start': word.start,
-                            'end': min(word.end, clip_end_ms)
-                        })
+                words = transcript_words(transcript)
+                first = np.searchsorted(words['start'], clip_start_ms, side='left')
+                last = np.searchsorted(words['start'], clip_end_ms, side='right')
+                segment_words = words[first:last].copy()
+                segment_words['end'] = np.minimum(segment_words['end'], clip_end_ms)
                 
                 logger.debug(f"Processing {len(segment_words)} words for the clip")
                 if (text):
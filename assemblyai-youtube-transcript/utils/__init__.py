@@ -1,15 +1,19 @@
 from .cli import parse_arguments
 from .logging_config import setup_logger
-from .time_utils import format_time, millisec_to_srt_time, parse_srt_timestamp
-from .text_utils import get_segment_texts, get_ass_style, parse_srt_file
+from .time_utils import format_time, millisec_to_srt_time, millisec_to_ass_times, parse_srt_timestamp
+from .text_utils import get_segment_texts, get_ass_style, parse_srt_file, words_to_array, transcript_words, WORD_DTYPE
 
 __all__ = [
     'parse_arguments',
     'setup_logger',
     'format_time',
     'millisec_to_srt_time',
+    'millisec_to_ass_times',
     'get_segment_texts',
     'get_ass_style',
     'parse_srt_timestamp',
-    'parse_srt_file'
+    'parse_srt_file',
+    'words_to_array',
+    'transcript_words',
+    'WORD_DTYPE'
 ]
\ No newline at end of file
@@ -1,6 +1,12 @@
-from typing import List, Tuple
+import functools
+import weakref
+import numpy as np
+from typing import List, Tuple, Union
 from .time_utils import parse_srt_timestamp
 
+# Column layout for word timestamps: contiguous start/end times (ms) plus the word text
+WORD_DTYPE = np.dtype([('start', np.float64), ('end', np.float64), ('text', object)])
+
 def get_segment_texts(full_text: str) -> Tuple[str, str]:
       """Extract start and end segments (5 words each) from text."""
       words = full_text.split()
@@ -64,8 +70,35 @@ def parse_srt_file(srt_path: str) -> List[dict]:
             
     return words
 
-def get_ass_style(font_size: int = 120, margin_v: int = 250) -> str:
-    """Returns ASS subtitle configuration with customizable styling."""
+def words_to_array(words: Union[List[dict], np.ndarray]) -> np.ndarray:
+    """Convert word timestamp dicts into a WORD_DTYPE structured array (arrays pass through)."""
+    if isinstance(words, np.ndarray):
+        return words
+    array = np.empty(len(words), dtype=WORD_DTYPE)
+    array['start'] = [word['start'] for word in words]
+    array['end'] = [word['end'] for word in words]
+    array['text'] = [word['text'] for word in words]
+    return array
+
+# Flattened word columns per transcript, released together with the transcript
+_transcript_words_cache = weakref.WeakKeyDictionary()
+
+def transcript_words(transcript) -> np.ndarray:
+    """Flatten a transcript's word objects into a WORD_DTYPE array (cached per transcript)."""
+    array = _transcript_words_cache.get(transcript)
+    if array is not None:
+        return array
+    words = transcript.words
+    array = np.empty(len(words), dtype=WORD_DTYPE)
+    array['start'] = [word.start for word in words]
+    array['end'] = [word.end for word in words]
+    array['text'] = [word.text for word in words]
+    _transcript_words_cache[transcript] = array
+    return array
+
+@functools.lru_cache(maxsize=16)
+def get_ass_style(font_size: int = 120, margin_v: int = 250, outline: int = 2) -> str:
+    """Returns ASS subtitle configuration with customizable styling (cached per style)."""
     return f"""[Script Info]
 ScriptType: v4.00+
 PlayResX: 1920
@@ -74,7 +107,7 @@ WrapStyle: 0
 
 [V4+ Styles]
 Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,{font_size},&HFFFFFF&,&H000000&,&H000000&,&H00000000,1,0,0,0,100,100,0,0,1,2,0,2,20,20,{margin_v},1
+Style: Default,Arial,{font_size},&HFFFFFF&,&H000000&,&H000000&,&H00000000,1,0,0,0,100,100,0,0,1,{outline},0,2,20,20,{margin_v},1
 
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
@@ -1,3 +1,6 @@
+import numpy as np
+from typing import List
+
 def format_time(seconds: float) -> str:
     """Format seconds into HH:MM:SS for display purposes."""
     seconds = round(seconds)
@@ -8,12 +11,18 @@ def format_time(seconds: float) -> str:
 
 def millisec_to_srt_time(ms: float) -> str:
     """Convert milliseconds to SRT timestamp format (HH:MM:SS,mmm)."""
-    seconds = ms / 1000
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    milliseconds = int((seconds - int(seconds)) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
+    seconds, milliseconds = divmod(int(round(ms)), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def millisec_to_ass_times(ms: np.ndarray) -> List[str]:
+    """Convert an array of milliseconds to ASS timestamps (H:MM:SS.cc), rounded to centiseconds."""
+    seconds, centiseconds = np.divmod((np.asarray(ms, dtype=np.float64) + 5).astype(np.int64) // 10, 100)
+    minutes, seconds = np.divmod(seconds, 60)
+    hours, minutes = np.divmod(minutes, 60)
+    return [f"{h}:{m:02d}:{s:02d}.{c:02d}" for h, m, s, c in zip(
+        hours.tolist(), minutes.tolist(), seconds.tolist(), centiseconds.tolist())]
 
 def parse_srt_timestamp(timestamp: str) -> int:
     """Convert SRT timestamp to milliseconds."""
@@ -1,28 +1,27 @@
 from typing import List, Dict, Tuple
-from urllib.parse import parse_qs, urlparse
 from rapidfuzz import fuzz, process
+import functools
+import re
 import sys
 import argparse
 from youtube_transcript_api import YouTubeTranscriptApi
 
+# Matches youtu.be/<id>, youtube.com/watch?...v=<id> and youtube.com/{embed,shorts,live,v}/<id>,
+# on youtube.com subdomains and youtube-nocookie.com alike
+VIDEO_ID_PATTERN = re.compile(
+    r'(?:youtu\.be/|youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#]*&)?v=|embed/|shorts/|live/|v/))([\w-]+)'
+)
+
 class YouTubeTranscriptSearcher:
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def get_video_id(url: str) -> str:
         """Extract video ID from various YouTube URL formats."""
         if not url:
             return None
-            
-        if "youtu.be" in url:
-            return url.split('/')[-1].split('?')[0]
-            
-        if "youtube.com" in url:
-            parsed_url = urlparse(url)
-            if "watch" in url:
-                return parse_qs(parsed_url.query).get('v', [None])[0]
-            elif "embed" in url:
-                return parsed_url.path.split('/')[-1]
-                
-        return None
+
+        match = VIDEO_ID_PATTERN.search(url)
+        return match.group(1) if match else None
 
     @staticmethod
     def compare_phrases(phrase1: str, phrase2: str) -> Tuple[float, float, float]: